@@ -1,3 +1,4 @@
+import functools
 import itertools
 import json
 import logging
@@ -33,12 +34,24 @@ def main():
 
 
 def get_events(json_log: Path) -> List[Dict]:
-    events = [e for e in json.loads(json_log.read_text()) if "log_event" in e]
-    assert all("message_id" in e for e in events), "All events must have a message_id"
-    events = [{**json.loads(e["log_event"]), "message_id": e["message_id"]} for e in events]
+    events = []
+    for e in json.loads(json_log.read_text()):
+        if "log_event" not in e:
+            continue
+        assert "message_id" in e, "All events must have a message_id"
+        event = __parse_log_event(e["log_event"]).copy()
+        event["message_id"] = e["message_id"]
+        events.append(event)
     return events
 
 
+@functools.lru_cache(maxsize=65536)
+def __parse_log_event(log_event: str) -> Dict:
+    # Many events share the same payload, so cache the parsed result. Callers must copy the
+    # returned dict before modifying it.
+    return json.loads(log_event)
+
+
 def print_stats(events: List[Dict]) -> None:
     event_types = (e["type"] for e in events)
     print("Events:")
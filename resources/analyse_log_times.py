@@ -1,8 +1,10 @@
+import collections
 import datetime
 import itertools
 import json
+import operator
 import sys
-from typing import List, Iterator, Tuple
+from typing import Dict, List, Iterator, Tuple
 
 from dateutil.parser import parse as parse_time
 
@@ -20,15 +22,12 @@ def main(log_path: str):
         sorted(elapsed_times_sec, key=lambda t: t[1], reverse=True), 100
     )
 
+    # Sum the elapsed time for each message
+    elapsed_time_by_message: Dict[str, float] = collections.defaultdict(float)
+    for log, elapsed_time_sec in elapsed_times_sec:
+        elapsed_time_by_message[log["msg"]] += elapsed_time_sec
     slowest_grouped = sorted(
-        [
-            (message, sum(t for _, t in logs))
-            for message, logs in itertools.groupby(
-                sorted(elapsed_times_sec, key=lambda t: t[0]["msg"]), key=lambda t: t[0]["msg"]
-            )
-        ],
-        key=lambda t: t[1],
-        reverse=True,
+        elapsed_time_by_message.items(), key=operator.itemgetter(1), reverse=True
     )
 
     print("Slowest individual:")
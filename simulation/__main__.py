@@ -2,6 +2,7 @@
 
 import argparse
 import logging
+import os
 from pathlib import Path
 
 import yaml
@@ -44,24 +45,33 @@ def main():
         default=None,
         help="Run a benchmark to see how well a configuration performs under " "varying conditions",
     )
+    parser.add_argument(
+        "--drop_caches",
+        action="store_true",
+        help="Drop filesystem caches before each benchmark simulation, for comparable timings "
+        "(needs root)",
+    )
 
     args = parser.parse_args()
+    # Check this up front, rather than failing once the first network has been built
+    if args.drop_caches and os.geteuid() != 0:
+        parser.error("--drop_caches needs to be run as root")
     network_config = Path(args.network_config)
     output_directory = Path(args.output_directory)
 
     key_creator = KeyCreator()
     with open(str(network_config), "r") as file:
-        network = Network.from_config(yaml.load(file), key_creator)
+        network = Network.from_config(yaml.load(file, Loader=utils.YAML_LOADER), key_creator)
 
     if args.benchmark is not None:
         if args.benchmark == "reliability":
-            benchmark = benchmarks.ReliabilityBenchmark(output_directory)
+            benchmark = benchmarks.ReliabilityBenchmark(output_directory, args.drop_caches)
         elif args.benchmark == "resilience":
-            benchmark = benchmarks.ResilienceBenchmark(output_directory)
+            benchmark = benchmarks.ResilienceBenchmark(output_directory, args.drop_caches)
         elif args.benchmark == "performance":
-            benchmark = benchmarks.PerformanceBenchmark(output_directory)
+            benchmark = benchmarks.PerformanceBenchmark(output_directory, args.drop_caches)
         elif args.benchmark == "scalability":
-            benchmark = benchmarks.ScalabilityBenchmark(output_directory)
+            benchmark = benchmarks.ScalabilityBenchmark(output_directory, args.drop_caches)
         else:
             raise ValueError(f"Unrecognized benchmark type: {args.benchmark}")
         log.info(f"Running {args.benchmark} benchmark")
@@ -31,7 +31,8 @@ class Backend(ABC):
         pass
 
     @abstractmethod
-    def get_human_readable_logs(self, node_id: NodeId) -> bytes:
+    def get_human_readable_logs(self, node_id: NodeId, tail: Optional[int] = None) -> bytes:
+        """Get the last `tail` lines of the daemon's output, or all of it if `tail` is `None`"""
         pass
 
     @abstractmethod
@@ -1,10 +1,14 @@
+import functools
+import io
 import json
 import logging
 import shutil
+import tarfile
 import tempfile
+import threading
 import time
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, NamedTuple
 
 import docker
 from docker.models.containers import Container
@@ -19,9 +23,19 @@ log = logging.getLogger(__name__)
 
 DOCKER_PREFIX = "kipa_simulation"
 IMAGE_PREFIX = f"{DOCKER_PREFIX}_image"
+BASE_IMAGE_NAME = f"{IMAGE_PREFIX}_base"
 NETWORK_NAME = f"{DOCKER_PREFIX}_network"
+# Everything we create is labelled so that docker can find it for us when cleaning up
+LABELS = {DOCKER_PREFIX: "true"}
 IPV4_PREFIX = "172.16"
 IPV6_PREFIX = "fd92:bd99:d235:d1c5::"
+DAEMON_STARTUP_BYTES = 256 * 1024 * 1024
+DAEMON_STARTUP_TIMEOUT_SEC = 30
+DAEMON_STARTUP_POLL_SEC = 0.1
+# The local server is started last, so once it's listening the CLI can reach the daemon too
+DAEMON_STARTED_MESSAGE = b"Started listening on unix socket"
+LOG_DIRECTORY = "/root/logs"
+LOG_TAIL_HEAD_SIZE = 256
 
 
 class DockerBackend(ParallelBackend):
@@ -30,28 +44,46 @@ class DockerBackend(ParallelBackend):
         self.__containers: Dict[NodeId, Container] = {}
         self.__ip_addresses: Dict[NodeId, str] = {}
 
-        self.__client = docker.from_env()
-        self.__api_client = docker.APIClient()
+        self.__client = _get_docker_client()
+        # Share the high-level client's connection pool rather than opening a second one
+        self.__api_client = self.__client.api
         self.__network: Optional[Network] = None
+        self.__log_directory: Optional[Path] = None
+        self.__log_tails: Dict[Tuple[NodeId, str], LogTail] = {}
+        # One lock per log file, so that reading one node's logs never blocks reading another's
+        self.__log_tail_locks: Dict[Tuple[NodeId, str], threading.Lock] = {}
 
     def initialize_network(self, network: Network, node_builds: Dict[NodeId, Build]) -> None:
         self.__network = self.__create_network(network)
+        self.__log_directory = Path(tempfile.mkdtemp(suffix="_logs"))
+        log.debug(f"Made log directory at {self.__log_directory}")
 
         log.info("Creating docker images")
-        builds = set(node_builds.values())
-        build_to_image = {build: self.__create_docker_image(build) for build in builds}
+        self.__create_base_image()
+        builds = list(set(node_builds.values()))
+        build_to_image = dict(zip(builds, self.pool.map(self.__create_docker_image, builds)))
 
         log.info(f"Creating {len(network.nodes)} containers")
+        # If too many daemons start at once, we run out of memory when GPG reads keys, causing
+        # daemon startups to fail. So only start as many as we have memory for, and wait for each
+        # daemon to finish starting up before starting another.
+        startup_semaphore = threading.BoundedSemaphore(
+            max(1, min(self.num_threads, _get_available_memory_bytes() // DAEMON_STARTUP_BYTES))
+        )
+
+        def create(index: int, node: Node) -> Tuple[NodeId, Container, str]:
+            image = build_to_image[node_builds[node.id]]
+            with startup_semaphore:
+                container, ip_address = self.__create_container(index, node, image, network)
+                self.__wait_for_daemon_startup(node.id)
+            return node.id, container, ip_address
+
         self.__containers = {}
         self.__ip_addresses = {}
-        for node in network.nodes:
-            image = build_to_image[node_builds[node.id]]
-            container, ip_address = self.__create_container(node, image, network)
-            self.__containers[node.id] = container
-            self.__ip_addresses[node.id] = ip_address
-            # FIXME: If we don't sleep, we run out of memory when GPG reads keys, causing daemon
-            # startups to fail.
-            time.sleep(0.3)
+        containers = self.pool.map(create, range(len(network.nodes)), network.nodes)
+        for node_id, container, ip_address in containers:
+            self.__containers[node_id] = container
+            self.__ip_addresses[node_id] = ip_address
 
         self.__fake_poor_connection(network.connection_quality)
 
@@ -74,31 +106,45 @@ class DockerBackend(ParallelBackend):
         self.__network.disconnect(self.__containers[node_id])
 
     def get_logs(self, node_id: NodeId) -> List[dict]:
-        return self.__get_logs_from_file(node_id, "/root/logs/log-daemon.json")
+        return self.__tail_logs_from_file(node_id, "log-daemon.json")
 
     def get_cli_logs(self, node_id: NodeId) -> List[dict]:
-        return self.__get_logs_from_file(node_id, "/root/logs/log-cli.json")
+        return self.__get_logs_from_file(node_id, "log-cli.json")
 
-    def get_human_readable_logs(self, node_id: NodeId) -> bytes:
-        logs = self.__containers[node_id].attach(stdout=True, stderr=True, stream=False, logs=True)
+    def get_human_readable_logs(self, node_id: NodeId, tail: Optional[int] = None) -> bytes:
+        logs = self.__containers[node_id].logs(
+            stdout=True, stderr=True, tail="all" if tail is None else tail
+        )
         assert isinstance(logs, bytes), f"Logs returned from docker was not bytes: {logs}"
         return logs
 
     def clean(self) -> None:
         log.info("Deleting old docker containers")
 
-        for container in self.__client.containers.list(all=True):
-            if not container.name.startswith(DOCKER_PREFIX):
-                continue
+        def remove(container: Container) -> None:
             log.debug(f"Removing container {container.name}")
             container.remove(force=True)
 
-        for network in self.__client.networks.list():
-            if not network.name.startswith(DOCKER_PREFIX):
-                continue
+        containers = self.__client.containers.list(all=True, filters={"label": DOCKER_PREFIX})
+        list(self.pool.map(remove, containers))
+
+        for network in self.__client.networks.list(filters={"label": DOCKER_PREFIX}):
             log.debug(f"Removing network {network.name}")
             network.remove()
 
+        if self.__log_directory is not None:
+            self.__remove_log_directory()
+            self.__log_directory = None
+        self.__log_tails = {}
+        self.__log_tail_locks = {}
+
+    def __remove_log_directory(self) -> None:
+        log.debug(f"Removing log directory {self.__log_directory}")
+        try:
+            shutil.rmtree(self.__log_directory)
+        except OSError as error:
+            log.warning(f"Failed to remove log directory {self.__log_directory}: {error}")
+
     def __create_network(self, network: Network):
         if not network.ipv6:
             log.debug("Using IPv4")
@@ -116,92 +162,128 @@ class DockerBackend(ParallelBackend):
             driver="bridge",
             ipam=docker.types.IPAMConfig(pool_configs=[ipam_pool]),
             enable_ipv6=network.ipv6,
+            labels=LABELS,
         )
 
-    def __create_docker_image(self, build: Build) -> str:
-        docker_directory = Path(tempfile.mkdtemp(suffix=build.id()))
-        log.debug(f"Made docker directory at {docker_directory}")
-
-        # TODO: Docker requires COPY files to be in the docker directory,
-        # meaning we copy the builds twice.
-        shutil.copy(str(build.cli_path), str(docker_directory / "kipa"))
-        shutil.copy(str(build.daemon_path), str(docker_directory / "kipa-daemon"))
-
-        log.debug("Creating Dockerfile")
-        with open(docker_directory / "Dockerfile", "w") as f:
-            # TODO: Base docker image has to use the same `glibc` as host
-            # machine
-            f.write(
-                f"""
-                FROM debian:buster-slim
-                ENV KIPA_KEY_ID ""
-                ENV KIPA_ARGS ""
-                RUN \\
-                    apt-get update && apt-get --yes install gpg iproute2
-                COPY kipa /root/kipa
-                COPY kipa-daemon /root/kipa-daemon
-                WORKDIR /root
-                ENV RUST_BACKTRACE=1
-                RUN \\
-                    chmod +x kipa && \\
-                    chmod +x kipa-daemon && \\
-                    echo "p@ssword" >> secret.txt
-                CMD \\
-                    for _ in $(seq 3); do \\
-                        ./kipa-daemon -vvvv --write-logs true --key $KIPA_KEY_ID $KIPA_ARGS; \\
-                        sleep 5; \\
-                    done
-            """
-            )
-
-        image_name = f"{IMAGE_PREFIX}_{build.id()}"
-        log.info(f"Building KIPA image {image_name} (may take a while)")
-        self.__client.images.build(path=str(docker_directory), tag=image_name, quiet=False)
+    def __create_base_image(self) -> None:
+        log.debug("Creating base Dockerfile")
+        # TODO: Base docker image has to use the same `glibc` as host
+        # machine
+        dockerfile = """
+            FROM debian:buster-slim
+            ENV KIPA_KEY_ID ""
+            ENV KIPA_ARGS ""
+            RUN \\
+                apt-get update && apt-get --yes install gpg iproute2
+            WORKDIR /root
+            ENV RUST_BACKTRACE=1
+            RUN echo "p@ssword" >> secret.txt
+            CMD \\
+                for _ in $(seq 3); do \\
+                    ./kipa-daemon -vvvv --write-logs true --key $KIPA_KEY_ID $KIPA_ARGS; \\
+                    sleep 5; \\
+                done
+        """
+
+        log.info(f"Building KIPA base image {BASE_IMAGE_NAME} (may take a while)")
+        self.__client.images.build(
+            fileobj=io.BytesIO(dockerfile.encode()), tag=BASE_IMAGE_NAME, quiet=False
+        )
 
-        log.info(f"Removing docker directory at {docker_directory}")
-        shutil.rmtree(docker_directory)
+    def __create_docker_image(self, build: Build) -> str:
+        # Only the binaries differ between builds, so copy them into a container of the base image
+        # and commit it rather than building a new image from scratch
+        log.debug("Archiving build binaries")
+        archive = io.BytesIO()
+        with tarfile.open(fileobj=archive, mode="w") as tar:
+            for path, name in [(build.cli_path, "kipa"), (build.daemon_path, "kipa-daemon")]:
+                tar_info = tar.gettarinfo(str(path), arcname=name)
+                tar_info.mode = 0o755
+                with open(str(path), "rb") as file:
+                    tar.addfile(tar_info, file)
+
+        build_id = build.id()
+        image_name = f"{IMAGE_PREFIX}_{build_id}"
+        log.info(f"Creating KIPA image {image_name}")
+        container = self.__client.containers.create(
+            BASE_IMAGE_NAME, name=f"{DOCKER_PREFIX}_image_creator_{build_id}", labels=LABELS
+        )
+        try:
+            container.put_archive("/root", archive.getvalue())
+            container.commit(repository=image_name)
+        finally:
+            container.remove(force=True)
 
         return image_name
 
     def __create_container(
-        self, node: Node, image_name: str, network: Network
+        self, index: int, node: Node, image_name: str, network: Network
     ) -> Tuple[Container, str]:
         container_name = f"{DOCKER_PREFIX}_{node.id}"
 
-        daemon_args = {
-            k: (str(v) if type(v) != bool else str(v).lower()) for k, v in node.daemon_args.items()
-        }
-        daemon_args = {k.replace("_", "-"): v for k, v in daemon_args.items()}
-        daemon_args = [f"--{k} {v}" for k, v in daemon_args.items()]
-        daemon_args = " ".join(daemon_args)
+        daemon_args = " ".join(
+            f"--{k.replace('_', '-')} {str(v).lower() if type(v) == bool else v}"
+            for k, v in node.daemon_args.items()
+        )
         log.debug(f"Daemon args: {daemon_args}")
 
+        # Logs are written to a bind mount so that they can be read directly from the host
+        node_log_directory = self.__log_directory / node.key_id()
+        node_log_directory.mkdir()
+
+        # Assign the container's address ourselves so that we don't have to inspect the container
+        # to find out what it is
+        if not network.ipv6:
+            container_address = f"{IPV4_PREFIX}.{index // 254 + 1}.{index % 254 + 1}"
+            endpoint_config = self.__api_client.create_endpoint_config(
+                ipv4_address=container_address
+            )
+            ip_address = f"{container_address}:10842"
+        else:
+            container_address = f"{IPV6_PREFIX}1:{index + 1:x}"
+            endpoint_config = self.__api_client.create_endpoint_config(
+                ipv6_address=container_address
+            )
+            ip_address = f"[{container_address}]:10842"
+
         log.info(f"Creating container with name {container_name}")
-        container = self.__client.containers.run(
+        container_id = self.__api_client.create_container(
             image=image_name,
             detach=True,
             name=container_name,
-            network=self.__network.name,
-            privileged=True,  # Needed for faking poor connections
-            mounts=[
-                docker.types.Mount(
-                    source=GPG_HOME, target="/root/.gnupg", type="bind", read_only=False,
-                )
-            ],
+            host_config=self.__api_client.create_host_config(
+                network_mode=self.__network.name,
+                privileged=True,  # Needed for faking poor connections
+                mounts=[
+                    docker.types.Mount(
+                        source=GPG_HOME, target="/root/.gnupg", type="bind", read_only=False,
+                    ),
+                    docker.types.Mount(
+                        source=str(node_log_directory), target=LOG_DIRECTORY, type="bind",
+                    ),
+                ],
+            ),
+            networking_config=self.__api_client.create_networking_config(
+                {self.__network.name: endpoint_config}
+            ),
             environment={"KIPA_KEY_ID": node.key_id(), "KIPA_ARGS": daemon_args},
-        )
-
-        network_details = self.__api_client.inspect_container(container.name)["NetworkSettings"][
-            "Networks"
-        ][self.__network.name]
-        if not network.ipv6:
-            ip_address = f"{network_details['IPAddress']}:10842"
-        else:
-            ip_address = f"[{network_details['GlobalIPv6Address']}]:10842"
+            labels=LABELS,
+        )["Id"]
+        self.__api_client.start(container_id)
+        container = self.__client.containers.prepare_model({"Id": container_id})
         log.debug(f"Created container with IP address {ip_address}")
 
         return container, ip_address
 
+    def __wait_for_daemon_startup(self, node_id: NodeId) -> None:
+        log_path = self.__log_directory / node_id.key_id / "log-daemon.json"
+        deadline_sec = time.time() + DAEMON_STARTUP_TIMEOUT_SEC
+        while time.time() < deadline_sec:
+            if log_path.is_file() and DAEMON_STARTED_MESSAGE in log_path.read_bytes():
+                return
+            time.sleep(DAEMON_STARTUP_POLL_SEC)
+        log.warning(f"Daemon on {node_id} did not start up within {DAEMON_STARTUP_TIMEOUT_SEC}s")
+
     def __run_container_command(self, node_id: NodeId, command: List[str]) -> Optional[str]:
         try:
             (exit_code, output) = self.__containers[node_id].exec_run(command)
@@ -225,10 +307,35 @@ class DockerBackend(ParallelBackend):
         return output
 
     def __get_logs_from_file(self, node_id: NodeId, file_name: str) -> List[Dict]:
-        raw_logs = self.__run_container_command(node_id, ["cat", file_name])
+        raw_logs = (self.__log_directory / node_id.key_id / file_name).read_text()
+        return self.__parse_logs(raw_logs)
+
+    def __tail_logs_from_file(self, node_id: NodeId, file_name: str) -> List[Dict]:
+        """Read logs from an append-only file, only parsing what was added since the last read"""
+
+        key = (node_id, file_name)
+        # `setdefault` is atomic, so concurrent callers for the same file always get the same lock
+        with self.__log_tail_locks.setdefault(key, threading.Lock()):
+            tail = self.__log_tails.get(key, LogTail(0, b"", []))
+            with open(str(self.__log_directory / node_id.key_id / file_name), "rb") as file:
+                head = file.read(LOG_TAIL_HEAD_SIZE)
+                if not head.startswith(tail.head):
+                    # The file has been rewritten (e.g. the daemon restarted), so start again
+                    tail = LogTail(0, b"", [])
+                file.seek(tail.offset)
+                new_bytes = file.read()
+
+            # Only parse complete lines, the rest is read again next time
+            end = new_bytes.rfind(b"\n") + 1
+            tail.logs.extend(self.__parse_logs(new_bytes[:end].decode()))
+            self.__log_tails[key] = LogTail(tail.offset + end, head, tail.logs)
+            return list(tail.logs)
+
+    @staticmethod
+    def __parse_logs(raw_logs: str) -> List[Dict]:
         logs: List[dict] = []
-        for line in raw_logs.split("\n"):
-            if line.strip() == "":
+        for line in raw_logs.splitlines():
+            if not line:
                 continue
             try:
                 json_dict = json.loads(line)
@@ -256,5 +363,35 @@ class DockerBackend(ParallelBackend):
             + (f"rate {quality.rate_kbps}kbit" if quality.rate_kbps != 0 else "")
         )
 
-        for container in self.__containers.values():
-            container.exec_run(command.split(" "))
+        # Only one rule is added per container, so there's nothing to batch into a single exec
+        args = command.split(" ")
+        list(
+            self.pool.map(
+                lambda node_id: self.__run_container_command(node_id, args),
+                self.__containers.keys(),
+            )
+        )
+
+
+@functools.lru_cache(maxsize=None)
+def _get_docker_client() -> docker.DockerClient:
+    # Each simulation makes a new backend, so share one client and its connections between them
+    return docker.from_env()
+
+
+def _get_available_memory_bytes() -> int:
+    try:
+        with open("/proc/meminfo") as file:
+            for line in file:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    log.warning("Couldn't read available memory, starting daemons one at a time")
+    return 0
+
+
+class LogTail(NamedTuple):
+    offset: int
+    head: bytes
+    logs: List[dict]
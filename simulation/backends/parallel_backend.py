@@ -1,7 +1,7 @@
 import logging
 from abc import ABC, abstractmethod
-from multiprocessing.pool import ThreadPool
-from typing import List, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Tuple, Optional
 
 from simulation.backends import Backend
 from simulation.backends.backend import CliCommand, CliCommandResult
@@ -11,7 +11,8 @@ log = logging.getLogger(__name__)
 
 class ParallelBackend(Backend, ABC):
     def __init__(self, num_threads: int):
-        self.pool = ThreadPool(processes=num_threads)
+        self.num_threads = num_threads
+        self.pool = ThreadPoolExecutor(max_workers=num_threads, thread_name_prefix="backend")
 
     def run_commands(self, commands: List[CliCommand]) -> List[CliCommandResult]:
         def run(pair: Tuple[int, CliCommand]) -> CliCommandResult:
@@ -27,7 +28,12 @@ class ParallelBackend(Backend, ABC):
             )
             return result
 
-        return self.pool.map(run, enumerate(commands))
+        # Collect results as they complete so that one slow command doesn't hold up the others
+        results: List[Optional[CliCommandResult]] = [None] * len(commands)
+        futures = {self.pool.submit(run, pair): pair[0] for pair in enumerate(commands)}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+        return results
 
     @abstractmethod
     def run_command(self, command: CliCommand) -> CliCommandResult:
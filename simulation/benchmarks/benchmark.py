@@ -1,19 +1,26 @@
+import json
+import logging
+import os
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Any
 
-import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 
 from simulation import utils
 from simulation.networks import Network
-from simulation.operations import simulator
+from simulation.operations import simulator, TestResult
+
+log = logging.getLogger(__name__)
 
 
 class Benchmark(ABC):
     def __init__(self, title: str, output_directory: Path) -> None:
         output_directory = output_directory / "benchmarks" / title / utils.get_formatted_time()
-        if not output_directory.is_dir():
-            output_directory.mkdir(parents=True)
+        output_directory.mkdir(parents=True, exist_ok=True)
 
         self.title = title
         self.output_directory = output_directory
@@ -25,23 +32,67 @@ class Benchmark(ABC):
 
 class SuccessSpeedBenchmark(Benchmark, ABC):
     def __init__(
-        self, title: str, parameters: List[Any], x_title: str, output_directory: Path,
+        self,
+        title: str,
+        parameters: List[Any],
+        x_title: str,
+        output_directory: Path,
+        drop_caches: bool = False,
     ):
         super().__init__(title, output_directory)
         self.parameters = parameters
         self.x_title = x_title
+        self.drop_caches = drop_caches
 
     def create(self, network: Network):
-        # Get results
-        results = [
-            simulator.simulate(
-                self.get_network(network, p), self.output_directory / self.format_parameter(p),
+        # Plot the results so far after each simulation, in the background so that the next
+        # simulation isn't held up
+        success_percentages = np.empty(len(self.parameters), dtype=np.float64)
+        average_search_times_sec = np.empty(len(self.parameters), dtype=np.float64)
+        with ThreadPoolExecutor(max_workers=1) as plot_pool:
+            plots = []
+            for i, p in enumerate(self.parameters):
+                if self.drop_caches:
+                    _drop_caches()
+                simulation_directory = self.output_directory / self.format_parameter(p)
+                result = simulator.simulate(self.get_network(network, p), simulation_directory)
+                self.__write_result(p, result, simulation_directory)
+
+                success_percentages[i] = result.success_percentage
+                average_search_times_sec[i] = result.average_search_times_sec
+                plots.append(
+                    plot_pool.submit(
+                        self.__plot,
+                        success_percentages[: i + 1].copy(),
+                        average_search_times_sec[: i + 1].copy(),
+                    )
+                )
+        for plot in plots:
+            plot.result()
+
+    def __write_result(
+        self, parameter: Any, result: TestResult, simulation_directory: Path
+    ) -> None:
+        # Append as each simulation finishes, so that results survive a failure part way through
+        with open(str(self.output_directory / "results.jsonl"), "a") as file:
+            json.dump(
+                {
+                    "parameter": self.format_parameter(parameter),
+                    "success_percentage": result.success_percentage,
+                    "average_search_times_sec": result.average_search_times_sec,
+                    "average_num_requests": result.average_num_requests,
+                    "directory": str(simulation_directory),
+                },
+                file,
             )
-            for p in self.parameters
-        ]
-
-        # Create matplotlib figure
-        figure = plt.figure()
+            file.write("\n")
+
+    def __plot(
+        self, success_percentages: np.ndarray, average_search_times_sec: np.ndarray
+    ) -> None:
+        # Create matplotlib figure, without pyplot as it isn't thread safe
+        figure = Figure()
+        FigureCanvasAgg(figure)
         success_axes = figure.add_subplot(111)
 
         # Set title and x label
@@ -49,20 +100,17 @@ class SuccessSpeedBenchmark(Benchmark, ABC):
         success_axes.set_xlabel(self.x_title)
 
         # Add search success plot
-        formatted_parameters = list(map(self.format_parameter, self.parameters))
+        parameters = self.parameters[: len(success_percentages)]
+        formatted_parameters = list(map(self.format_parameter, parameters))
         success_axes.set_ylabel("Search success (%)")
         success_axes.tick_params("y", colors="r")
-        success_axes.plot(
-            formatted_parameters, [result.success_percentage * 100 for result in results], "r-",
-        )
+        success_axes.plot(formatted_parameters, success_percentages * 100, "r-")
 
         # Add speed plot
         speed_axes = success_axes.twinx()
         speed_axes.set_ylabel("Successful search time (seconds)")
         speed_axes.tick_params("y", colors="b")
-        speed_axes.plot(
-            formatted_parameters, [result.average_search_times_sec for result in results], "b-",
-        )
+        speed_axes.plot(formatted_parameters, average_search_times_sec, "b-")
 
         # Save the figure
         figure.savefig(self.output_directory / "results.png")
@@ -74,3 +122,12 @@ class SuccessSpeedBenchmark(Benchmark, ABC):
 
     def format_parameter(self, parameter: Any) -> str:
         return str(parameter)
+
+
+def _drop_caches() -> None:
+    # Otherwise later simulations start daemons from a warmer page cache than earlier ones, which
+    # skews search times between parameters
+    log.debug("Dropping filesystem caches")
+    os.sync()
+    with open("/proc/sys/vm/drop_caches", "w") as file:
+        file.write("3")
@@ -13,9 +13,13 @@ Network qualities ranging from 0% loss, 0ms delay, and 1mbps, to 15% loss, 250ms
 
 
 class PerformanceBenchmark(SuccessSpeedBenchmark):
-    def __init__(self, output_directory: Path):
+    def __init__(self, output_directory: Path, drop_caches: bool = False):
         super().__init__(
-            "performance", CONNECTION_QUALITIES, "Network quality (0-1 scale)", output_directory,
+            "performance",
+            CONNECTION_QUALITIES,
+            "Network quality (0-1 scale)",
+            output_directory,
+            drop_caches,
         )
 
     def get_network(self, network: Network, quality_rating: float) -> Network:
@@ -27,6 +31,4 @@ class PerformanceBenchmark(SuccessSpeedBenchmark):
         quality_network = network._replace(connection_quality=quality)
 
         # Set timeout high so that the daemon does not exit searches that take too long.
-        return quality_network.map_nodes(
-            lambda n: n.replace(daemon_args={**n.daemon_args, "search_timeout_sec": 10000})
-        )
+        return quality_network.with_daemon_arg("search_timeout_sec", 10000)
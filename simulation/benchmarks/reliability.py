@@ -1,6 +1,7 @@
-import random
 from pathlib import Path
 
+import numpy as np
+
 from simulation.benchmarks import SuccessSpeedBenchmark
 from simulation.networks import Network
 
@@ -8,15 +9,20 @@ DISCONNECT_PROBABILITIES = [x / 10 for x in range(10)]
 
 
 class ReliabilityBenchmark(SuccessSpeedBenchmark):
-    def __init__(self, output_directory: Path):
+    def __init__(self, output_directory: Path, drop_caches: bool = False):
         super().__init__(
-            "reliability", DISCONNECT_PROBABILITIES, "Disconnect probability", output_directory,
+            "reliability",
+            DISCONNECT_PROBABILITIES,
+            "Disconnect probability",
+            output_directory,
+            drop_caches,
         )
 
     def get_network(self, network: Network, disconnect_probability: float) -> Network:
-        return network.map_nodes(
-            lambda n: n.replace(disconnect_before_tests=random.random() < disconnect_probability)
+        disconnects = iter(
+            (np.random.random(len(network.nodes)) < disconnect_probability).tolist()
         )
+        return network.map_nodes(lambda n: n.replace(disconnect_before_tests=next(disconnects)))
 
     def format_parameter(self, parameter: float) -> str:
         return str(parameter * 100)
@@ -1,6 +1,8 @@
 import logging
-import random
 from pathlib import Path
+from typing import Dict, Any
+
+import numpy as np
 
 from simulation.benchmarks import SuccessSpeedBenchmark
 from simulation.networks import Network, Node
@@ -8,29 +10,41 @@ from simulation.networks import Network, Node
 log = logging.getLogger(__name__)
 
 REMOVE_FLAGS = {"neighbours_size", "neighbour_gc_enabled", "search_breadth"}
-MALICIOUS_FEATURES = {"use-random-response", "use-protobuf", "use-tcp", "use-unix-socket"}
+MALICIOUS_FEATURES = frozenset(
+    {"use-random-response", "use-protobuf", "use-tcp", "use-unix-socket"}
+)
 
 MALICIOUS_PROBABILITIES = [x / 10 for x in range(10)]
 
 
 class ResilienceBenchmark(SuccessSpeedBenchmark):
-    def __init__(self, output_directory: Path):
+    def __init__(self, output_directory: Path, drop_caches: bool = False):
         super().__init__(
-            "resilience", MALICIOUS_PROBABILITIES, "Malicious probability (%)", output_directory,
+            "resilience",
+            MALICIOUS_PROBABILITIES,
+            "Malicious probability (%)",
+            output_directory,
+            drop_caches,
         )
 
     def get_network(self, network: Network, malicious_probability: float) -> Network:
+        malicious = iter((np.random.random(len(network.nodes)) < malicious_probability).tolist())
+        malicious_daemon_args = network.map_distinct_daemon_args(
+            lambda args: {k: v for k, v in args.items() if k not in REMOVE_FLAGS}
+        )
         return network.map_nodes(
-            lambda n: _to_malicious_node(n) if random.random() < malicious_probability else n
+            lambda n: _to_malicious_node(n, malicious_daemon_args[id(n.daemon_args)])
+            if next(malicious)
+            else n
         )
 
     def format_parameter(self, parameter: float) -> str:
         return str(parameter * 100)
 
 
-def _to_malicious_node(node: Node) -> Node:
+def _to_malicious_node(node: Node, daemon_args: Dict[str, Any]) -> Node:
     return node.replace(
         clear_default_features=True,
-        additional_features=frozenset(MALICIOUS_FEATURES),
-        daemon_args={k: v for k, v in node.daemon_args.items() if k not in REMOVE_FLAGS},
+        additional_features=MALICIOUS_FEATURES,
+        daemon_args=daemon_args,
     )
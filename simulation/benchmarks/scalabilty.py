@@ -12,12 +12,18 @@ NETWORK_SIZES = list(range(20, 201, 20))
 
 
 class ScalabilityBenchmark(SuccessSpeedBenchmark):
-    def __init__(self, output_directory: Path):
-        super().__init__("scalability", NETWORK_SIZES, "Network size", output_directory)
+    def __init__(self, output_directory: Path, drop_caches: bool = False):
+        super().__init__(
+            "scalability", NETWORK_SIZES, "Network size", output_directory, drop_caches
+        )
 
-    def get_network(self, network: Network, network_size: int) -> Network:
+    def create(self, network: Network) -> None:
         assert len(network.nodes) >= max(
             NETWORK_SIZES
         ), "Configured network must be larger than max network size test."
-        nodes = random.sample(network.nodes, network_size)
-        return network.replace(nodes=nodes)
+        # Shuffle once so that each network size is a prefix, rather than sampling for every size
+        shuffled_nodes = random.sample(network.nodes, len(network.nodes))
+        super().create(network.replace(nodes=shuffled_nodes))
+
+    def get_network(self, network: Network, network_size: int) -> Network:
+        return network.replace(nodes=network.nodes[:network_size])
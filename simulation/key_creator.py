@@ -2,7 +2,7 @@ import logging
 import os
 import re
 import subprocess
-import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Set
 
 log = logging.getLogger(__name__)
@@ -10,6 +10,21 @@ log = logging.getLogger(__name__)
 GPG_HOME = os.path.join(os.getcwd(), ".gnupg")
 GPG_EXECUTABLE = "gpg"
 GPG_ARGS = ["--homedir", GPG_HOME]
+GPG_KEY_COMMANDS = """
+    %echo Generating key for KIPA tests
+    Key-Type: RSA
+    Key-Length: 1024
+    Subkey-Type: RSA
+    Subkey-Length: 1024
+    Name-Real: Test Key
+    Name-Comment: Test Key
+    Name-Email: test@key.com
+    Expire-Date: 0
+    Passphrase: p@ssword
+    %commit
+    %echo Finished generating key for KIPA tests
+"""
+GPG_KEY_CREATED_PATTERN = re.compile(rb"key ([A-F0-9]+) marked as ultimately trusted")
 
 
 class KeyCreator:
@@ -26,38 +41,34 @@ class KeyCreator:
             return key_id
 
         log.info("Creating new key")
-
-        if not os.path.isdir(GPG_HOME):
-            log.debug("Creating GPG home directory")
-            os.mkdir(GPG_HOME)
-
+        self.__create_gpg_home()
         key_id = self.__create_new_key()
         self.__key_ids.add(key_id)
         self.__used_key_ids.add(key_id)
         return key_id
 
+    def create_keys(self, num_keys: int) -> None:
+        """Make sure there are at least `num_keys` unused keys, creating any missing in parallel"""
+        num_missing = num_keys - len(self.__key_ids.difference(self.__used_key_ids))
+        if num_missing <= 0:
+            return
+
+        log.info(f"Creating {num_missing} new keys")
+        self.__create_gpg_home()
+
+        # Key generation happens in GPG subprocesses, so threads are enough to run them in parallel
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+            key_ids = list(pool.map(lambda _: self.__create_new_key(), range(num_missing)))
+        self.__key_ids.update(key_ids)
+
     @staticmethod
-    def __create_new_key() -> str:
-        log.debug("Writing GPG commands to temp file")
-        gpg_commands = tempfile.NamedTemporaryFile(mode="w")
-        gpg_commands.write(
-            """
-            %echo Generating key for KIPA tests
-            Key-Type: RSA
-            Key-Length: 1024
-            Subkey-Type: RSA
-            Subkey-Length: 1024
-            Name-Real: Test Key
-            Name-Comment: Test Key
-            Name-Email: test@key.com
-            Expire-Date: 0
-            Passphrase: p@ssword
-            %commit
-            %echo Finished generating key for KIPA tests
-        """
-        )
-        gpg_commands.flush()
+    def __create_gpg_home() -> None:
+        if not os.path.isdir(GPG_HOME):
+            log.debug("Creating GPG home directory")
+            os.mkdir(GPG_HOME)
 
+    @staticmethod
+    def __create_new_key() -> str:
         log.debug("Making key...")
         gpg_output: bytes = subprocess.check_output(
             [
@@ -65,44 +76,41 @@ class KeyCreator:
                 *GPG_ARGS,
                 # No interactive
                 "--batch",
-                # Generate the key with the saved GPG commands
+                # Generate the key with the GPG commands given on stdin
                 "--generate-key",
-                gpg_commands.name,
             ],
+            input=GPG_KEY_COMMANDS.encode(),
             stderr=subprocess.STDOUT,
         )
         log.debug("Finished making key")
 
-        match = re.search(r"key ([A-F0-9]+) marked as ultimately trusted", gpg_output.decode())
+        match = GPG_KEY_CREATED_PATTERN.search(gpg_output)
         assert match, f"Failed to find key in GPG output: {gpg_output}"
-        return match.group(1)[-8:]  # Get last 8 characters of fingerprint.
+        return match.group(1)[-8:].decode()  # Get last 8 characters of fingerprint.
 
     @staticmethod
     def __existing_key_ids() -> Set[str]:
         log.info("Getting the number of existing keys")
-        gpg_process = subprocess.Popen(
+        # GPG fails when the home directory doesn't exist yet, which just means there are no keys
+        gpg_output: bytes = subprocess.run(
             [GPG_EXECUTABLE, *GPG_ARGS, "--list-secret-keys", "--with-colons"],
             stdout=subprocess.PIPE,
-        )
+        ).stdout
 
         key_ids: List[str] = []
         seen_sec = False
-        while True:
-            line = gpg_process.stdout.readline().decode()
-            if line == "":
-                break
-            if line.startswith("sec"):
+        for line in gpg_output.splitlines():
+            if line.startswith(b"sec"):
                 seen_sec = True
-            if line.startswith("fpr") and seen_sec:
+            if line.startswith(b"fpr") and seen_sec:
                 seen_sec = False
                 key_ids.append(KeyCreator.__key_id_from_line(line))
-        gpg_process.wait()
 
         return set(key_ids)
 
     @staticmethod
-    def __key_id_from_line(line: str) -> str:
+    def __key_id_from_line(line: bytes) -> str:
         # Fingerprint is in the second to last column
-        full_fingerprint = line.split(":")[-2].strip()
+        full_fingerprint = line.split(b":")[-2].strip()
         # Key ID is the last eight characters for the fingerprint
-        return full_fingerprint[-8:]
+        return full_fingerprint[-8:].decode()
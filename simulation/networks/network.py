@@ -1,7 +1,7 @@
 import logging
 import random
 from enum import Enum
-from typing import List, NamedTuple, Optional, Callable
+from typing import List, NamedTuple, Optional, Callable, Dict, Any
 
 from simulation.key_creator import KeyCreator
 from simulation.networks import Node, NodeId
@@ -22,6 +22,7 @@ class Network(NamedTuple):
     # TODO: Try to not use KeyCreator here
     @classmethod
     def from_config(cls, config: dict, key_creator: KeyCreator) -> "Network":
+        key_creator.create_keys(sum(group_config["size"] for group_config in config["groups"]))
         nodes = [
             node
             for group_config in config["groups"]
@@ -51,6 +52,28 @@ class Network(NamedTuple):
     def map_nodes(self, fn: Callable[[Node], Node]) -> "Network":
         return self._replace(nodes=list(map(fn, self.nodes)))
 
+    def with_daemon_arg(self, key: str, value: Any) -> "Network":
+        """Set a daemon argument on every node
+
+        Nodes that shared a daemon arguments dict before share the new one, so this only copies
+        each distinct dict once.
+        """
+        daemon_args = self.map_distinct_daemon_args(lambda args: {**args, key: value})
+        return self.map_nodes(lambda n: n.replace(daemon_args=daemon_args[id(n.daemon_args)]))
+
+    def map_distinct_daemon_args(
+        self, fn: Callable[[Dict[str, Any]], Dict[str, Any]]
+    ) -> Dict[int, Dict[str, Any]]:
+        """Apply `fn` once to each distinct daemon arguments dict, keyed by the original's `id`
+
+        Nodes in the same group share one daemon arguments dict, so this saves mapping it per node.
+        """
+        daemon_args: Dict[int, Dict[str, Any]] = {}
+        for node in self.nodes:
+            if id(node.daemon_args) not in daemon_args:
+                daemon_args[id(node.daemon_args)] = fn(node.daemon_args)
+        return daemon_args
+
     def replace(self, *_, **kwargs) -> "Network":
         return self._replace(**kwargs)
 
@@ -61,20 +84,18 @@ class ConnectType(Enum):
 
     @classmethod
     def from_str(cls, s: str) -> "ConnectType":
-        if s == "cyclical":
-            return ConnectType.CYCLICAL
-        elif s == "rooted":
-            return ConnectType.ROOTED
-        else:
+        if s not in CONNECT_TYPES_BY_STR:
             raise ValueError(f"Unrecognized `ConnectType`: {s}")
+        return CONNECT_TYPES_BY_STR[s]
 
     def to_str(self) -> str:
-        if self == ConnectType.CYCLICAL:
-            return "cyclical"
-        elif self == ConnectType.ROOTED:
-            return "rooted"
-        else:
+        if self not in CONNECT_TYPE_STRS:
             raise ValueError(f"Unhandled `ConnectType`: {self}")
+        return CONNECT_TYPE_STRS[self]
+
+
+CONNECT_TYPES_BY_STR = {"cyclical": ConnectType.CYCLICAL, "rooted": ConnectType.ROOTED}
+CONNECT_TYPE_STRS = {v: k for k, v in CONNECT_TYPES_BY_STR.items()}
 
 
 class ConnectionQuality:
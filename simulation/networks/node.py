@@ -1,3 +1,4 @@
+import sys
 from typing import NamedTuple, List, FrozenSet, Dict, Any
 
 from simulation.key_creator import KeyCreator
@@ -26,7 +27,8 @@ class Node(NamedTuple):
     def from_config(cls, config: dict, key_creator: KeyCreator) -> List["Node"]:
         return [
             Node(
-                NodeId(key_creator.get_key_id()),
+                # Key IDs are compared and hashed constantly when indexing logs
+                NodeId(sys.intern(key_creator.get_key_id())),
                 config.get("daemon_args", {}),
                 frozenset(config.get("additional_features", [])),
                 config.get("clear_default_features", False),
@@ -1,6 +1,6 @@
 from .liveness import ensure_all_alive
 from .logger import NetworkLogs, NodeLogs, get_logs, write_logs
 from .builder import create_builds
-from .drawer import draw_main_graph, draw_query_graph
+from .drawer import draw_main_graph, draw_query_graph, get_drawing_logs
 from .tester import TestResult, sample_test_searches
 from .connecter import connect_network
@@ -1,3 +1,4 @@
+import functools
 import logging
 import os
 import shutil
@@ -30,6 +31,8 @@ def create_builds(nodes: List[Node]) -> Dict[NodeId, Build]:
     return {node_id: builds_to_directories[args] for node_id, args in node_to_args.items()}
 
 
+# Sources don't change during a run, so each configuration only needs building once per process
+@functools.lru_cache(maxsize=None)
 def __create_build(args: BuildArgs) -> Build:
     directory = Path(tempfile.mkdtemp())
     log.debug(f"Made build directory at {directory}")
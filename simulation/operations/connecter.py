@@ -1,8 +1,10 @@
 import logging
+import random
+from typing import List, Tuple
 
 from simulation.backends import Backend
 from simulation.backends.backend import CliCommand
-from simulation.networks import Network, ConnectType
+from simulation.networks import Network, ConnectType, NodeId
 from simulation.operations import ensure_all_alive
 
 log = logging.getLogger(__name__)
@@ -13,21 +15,32 @@ def connect_network(network: Network, backend: Backend) -> None:
 
     ensure_all_alive(network, backend)
 
+    ids = network.ids()
+    if network.connect_type == ConnectType.CYCLICAL:
+        cyclical_commands = __get_connect_commands(list(zip(ids[:-1], ids[1:])), backend)
+    elif network.connect_type != ConnectType.ROOTED:
+        raise AssertionError()
+
     for i in range(network.num_connects):
         log.info(f"Performing connection {i + 1}/{network.num_connects}")
 
-        ids = network.ids()
         if network.connect_type == ConnectType.CYCLICAL:
-            connections = list(zip(ids[:-1], ids[1:]))
-        elif network.connect_type == ConnectType.ROOTED:
-            [root_id] = network.random_ids(1)
-            connections = [(i, root_id) for i in ids]
+            commands = cyclical_commands
         else:
-            raise AssertionError()
-        commands = [
-            CliCommand(a, ["connect", "--key", b.key_id, "--address", backend.get_ip_address(b),],)
-            for a, b in connections
-        ]
+            # Each round connects to a different random root
+            root_id = random.choice(ids)
+            commands = __get_connect_commands(
+                [(node_id, root_id) for node_id in ids if node_id != root_id], backend
+            )
         results = backend.run_commands(commands)
         num_failed = sum(not result.successful() for result in results)
-        log.info("Out of %d connections, %d failed", len(connections), num_failed)
+        log.info("Out of %d connections, %d failed", len(commands), num_failed)
+
+
+def __get_connect_commands(
+    connections: List[Tuple[NodeId, NodeId]], backend: Backend
+) -> List[CliCommand]:
+    return [
+        CliCommand(a, ["connect", "--key", b.key_id, "--address", backend.get_ip_address(b),],)
+        for a, b in connections
+    ]
@@ -1,9 +1,9 @@
 import logging
-import operator
 import re
 from pathlib import Path
 from typing import List, Iterator, Dict, Tuple, NamedTuple
 
+import numpy as np
 from PIL import Image, ImageDraw
 
 from simulation.networks import NodeId
@@ -13,6 +13,8 @@ log = logging.getLogger(__name__)
 
 IMAGE_DIMS = [1920, 1080]
 NODE_RADIUS = 10
+KEY_SPACE_PREFIX = "KeySpace("
+KEY_PATTERN = re.compile(r"Key\(([0-9A-F]+)\)")
 
 
 class GraphNode(NamedTuple):
@@ -26,7 +28,7 @@ def draw_main_graph(logs: NetworkLogs, save_path: Path) -> None:
     neighbours = list(__get_neighbours(logs, key_to_node))
     neighbours = __remove_fake_neighbours(graph, neighbours)
     location_dict = __get_location_dict(graph, IMAGE_DIMS)
-    image = Image.new("RGBA", tuple(IMAGE_DIMS), color="white")
+    image = Image.new("RGB", tuple(IMAGE_DIMS), color="white")
     draw = ImageDraw.Draw(image)
     __draw_neighbours(neighbours, location_dict, draw)
     __draw_nodes(graph, location_dict, draw)
@@ -41,7 +43,7 @@ def draw_query_graph(
     message_neighbours = list(__get_message_neighbours(logs.get(from_id), message_id, key_to_node))
     message_neighbours = __remove_fake_neighbours(graph, message_neighbours)
     location_dict = __get_location_dict(graph, IMAGE_DIMS)
-    image = Image.new("RGBA", tuple(IMAGE_DIMS), color="white")
+    image = Image.new("RGB", tuple(IMAGE_DIMS), color="white")
     draw = ImageDraw.Draw(image)
     __draw_neighbours(message_neighbours, location_dict, draw)
     __draw_nodes(graph, location_dict, draw)
@@ -62,23 +64,44 @@ def draw_query_graph(
         log.warning(f"Failed to write image with error: {e}")
 
 
+def get_drawing_logs(logs: NetworkLogs) -> NetworkLogs:
+    """Get only the logs that are used when drawing graphs"""
+    return NetworkLogs(
+        {
+            node_id: NodeLogs([l for l in logs.get(node_id).logs if __is_drawing_log(l)], b"")
+            for node_id in logs.node_ids()
+        }
+    )
+
+
+def __is_drawing_log(l: dict) -> bool:
+    return bool(
+        # Used for node positions
+        (l.get("neighbours_store") and "local_key_space" in l)
+        # Used for the main graph's neighbours
+        or (l.get("list_neighbours") and l.get("reply"))
+        # Used for query graphs' neighbours
+        or ("message_id" in l and "found" in l)
+    )
+
+
 def __draw_nodes(
     graph: List[GraphNode], location_dict: Dict[NodeId, Tuple[float, float]], draw: ImageDraw,
 ):
     """Draw all nodes as circles"""
 
-    for n in graph:
-        __draw_node_circle(location_dict[n.node_id], draw)
+    locations = [location_dict[n.node_id] for n in graph]
+    for location in locations:
+        __draw_node_circle(location, draw)
 
     # Draw the key IDs next to the nodes
     # Done last to keep above node/neighbour drawings
-    for n in graph:
-        (x, y) = location_dict[n.node_id]
-        draw.text((x, y), n.node_id.key_id, fill="black")
+    for n, location in zip(graph, locations):
+        draw.text(location, n.node_id.key_id, fill="black")
 
 
 def __draw_node_circle(centre: Tuple[float, float], draw: ImageDraw, color: str = "green"):
-    x, y = centre
+    x, y = int(centre[0]), int(centre[1])
     draw.ellipse(
         (x - NODE_RADIUS, y - NODE_RADIUS, x + NODE_RADIUS, y + NODE_RADIUS), fill=color,
     )
@@ -91,11 +114,15 @@ def __draw_neighbours(
 ):
     """Draw all neighbour connections"""
 
+    neighbour_set = set(neighbours)
     for from_node, to_node in neighbours:
+        bidirectional_neighbour = (to_node, from_node) in neighbour_set
+        if bidirectional_neighbour and from_node > to_node:
+            # The same line is drawn for the reverse pair
+            continue
+
         (ax, ay) = location_dict[from_node]
         (bx, by) = location_dict[to_node]
-        bidirectional_neighbour = (to_node, from_node) in neighbours
-
         if bidirectional_neighbour:
             # If both nodes of neighbours of each other, draw a green line
             draw.line((ax, ay, bx, by), fill="green", width=4)
@@ -109,15 +136,20 @@ def __draw_neighbours(
 
 def __get_nodes(logs: NetworkLogs) -> Iterator[GraphNode]:
     for node_id in logs.node_ids():
-        ns_logs = filter(
-            lambda l: "neighbours_store" in l and l["neighbours_store"] and "local_key_space" in l,
-            logs.get(node_id).logs,
+        key_space_str = next(
+            (
+                l["local_key_space"]
+                for l in logs.get(node_id).logs
+                if l.get("neighbours_store") and "local_key_space" in l
+            ),
+            None,
         )
-        key_space_logs = list(map(operator.itemgetter("local_key_space"), ns_logs))
-        if len(key_space_logs) == 0:
+        if key_space_str is None:
             continue
-        groups = re.match(r"KeySpace\(([-0-9, ]+)\)", key_space_logs[0])
-        key_space = list(map(int, groups.group(1).split(", ")))
+        assert key_space_str.startswith(KEY_SPACE_PREFIX) and key_space_str.endswith(
+            ")"
+        ), f"Unrecognized key space: {key_space_str}"
+        key_space = list(map(int, key_space_str[len(KEY_SPACE_PREFIX) : -1].split(", ")))
 
         yield GraphNode(node_id, key_space)
 
@@ -126,13 +158,18 @@ def __get_neighbours(
     logs: NetworkLogs, key_to_node: Dict[str, NodeId]
 ) -> Iterator[Tuple[NodeId, NodeId]]:
     for node_id in logs.node_ids():
-        flags = ["list_neighbours", "reply"]
-        neighbours_logs = list(
-            filter(lambda l: all(map(lambda f: f in l and l[f], flags)), logs.get(node_id).logs,)
+        # Only the latest neighbours reply is used, so search from the end
+        neighbours_log = next(
+            (
+                l
+                for l in reversed(logs.get(node_id).logs)
+                if l.get("list_neighbours") and l.get("reply")
+            ),
+            None,
         )
-        if len(neighbours_logs) == 0:
-            return iter([])
-        neighbours = neighbours_logs[-1]["neighbour_keys"]
+        if neighbours_log is None:
+            return
+        neighbours = neighbours_log["neighbour_keys"]
 
         if neighbours == "":
             continue
@@ -159,41 +196,35 @@ def __get_message_neighbours(
 def __get_location_dict(
     graph: List[GraphNode], image_dims: List[int]
 ) -> Dict[NodeId, Tuple[float, float]]:
-    # Get the points and transpose them for bound calculation
-    points = map(lambda n: n.position, graph)
-    points_t = list(zip(*points))
+    if not graph:
+        return {}
+    points = np.array([n.position for n in graph], dtype=np.float64)
 
     # Get the bounds of the dimensions
-    unpadded_max_points = list(map(max, points_t))
-    unpadded_min_points = list(map(min, points_t))
+    unpadded_max_points = points.max(axis=0)
+    unpadded_min_points = points.min(axis=0)
 
     # Add a padding of 10% around the bounds
-    max_points = [
-        _max + (_max - _min) * 0.1 for _max, _min in zip(unpadded_max_points, unpadded_min_points)
-    ]
-    min_points = [
-        _min - (_max - _min) * 0.1 for _max, _min in zip(unpadded_max_points, unpadded_min_points)
-    ]
+    padding = (unpadded_max_points - unpadded_min_points) * 0.1
+    max_points = unpadded_max_points + padding
+    min_points = unpadded_min_points - padding
 
     # Normalize the points within the bounds
-    def normalize_point(ps: List[int]) -> Tuple[float, float]:
-        normalized = [
-            ((i - _min) / (_max - _min)) for i, _max, _min in zip(ps, max_points, min_points)
-        ]
-        if len(normalized) == 1:
-            normalized.append(0)
-        if len(normalized) != 2:
-            log.warning(f"No support for drawing !=2 dimensions, " f"found {len(normalized)}")
-            normalized = normalized[:2]
-        return tuple(float(i * dim) for i, dim in zip(normalized, image_dims))[:2]
+    normalized = (points - min_points) / (max_points - min_points)
+    if normalized.shape[1] == 1:
+        normalized = np.hstack([normalized, np.zeros_like(normalized)])
+    if normalized.shape[1] != 2:
+        log.warning(f"No support for drawing !=2 dimensions, " f"found {normalized.shape[1]}")
+        normalized = normalized[:, :2]
+    locations = normalized * np.array(image_dims, dtype=np.float64)
 
-    return dict((n.node_id, normalize_point(n.position)) for n in graph)
+    return dict(zip((n.node_id for n in graph), map(tuple, locations.tolist())))
 
 
 def __get_key_id_from_string(s: str) -> str:
-    groups = list(re.finditer(r"Key\(([0-9A-F]+)\)", s))
-    assert len(groups) == 1, f"Could not find exactly one key in {s}"
-    key_id = groups[0].group(1)
+    key_ids = KEY_PATTERN.findall(s)
+    assert len(key_ids) == 1, f"Could not find exactly one key in {s}"
+    key_id = key_ids[0]
     assert len(key_id) == 8, f"Found key that was not 8 long: {key_id}"
     return key_id
 
@@ -202,7 +233,7 @@ def __remove_fake_neighbours(
     graph: List[GraphNode], neighbours: List[Tuple[NodeId, NodeId]]
 ) -> List[Tuple[NodeId, NodeId]]:
     neighbour_ids = set(n for ns in neighbours for n in ns)
-    graph_ids = [node.node_id for node in graph]
+    graph_ids = frozenset(node.node_id for node in graph)
 
     if not neighbour_ids.issubset(graph_ids):
         log.error(
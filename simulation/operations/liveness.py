@@ -7,14 +7,17 @@ from simulation.networks import Network
 
 log = logging.getLogger(__name__)
 
-NUM_ATTEMPTS = 10
-ATTEMPT_WAIT_SECS = 10
+# Waits of 0.5, 1, 2, 4, then 8 seconds between attempts add up to about 100 seconds in total
+NUM_ATTEMPTS = 17
+INITIAL_WAIT_SECS = 0.5
+MAX_WAIT_SECS = 8.0
 
 
 def ensure_all_alive(network: Network, backend: Backend) -> None:
     log.debug("Ensuring all nodes in the network are alive")
 
     ids = network.ids()
+    wait_secs = INITIAL_WAIT_SECS
 
     for attempt in range(NUM_ATTEMPTS):
         commands = [CliCommand(node_id, ["list-neighbours"]) for node_id in ids]
@@ -23,13 +26,16 @@ def ensure_all_alive(network: Network, backend: Backend) -> None:
         if not ids:
             log.debug("All nodes ensured alive")
             return
+        if attempt == NUM_ATTEMPTS - 1:
+            break
         log.debug(
-            "At attempt %d/%d, still %d nodes not responding. Sleeping %d seconds.",
+            "At attempt %d/%d, still %d nodes not responding. Sleeping %.1f seconds.",
             attempt + 1,
             NUM_ATTEMPTS,
             len(ids),
-            ATTEMPT_WAIT_SECS,
+            wait_secs,
         )
-        time.sleep(ATTEMPT_WAIT_SECS)
+        time.sleep(wait_secs)
+        wait_secs = min(wait_secs * 2, MAX_WAIT_SECS)
 
     raise AssertionError(f"{len(ids)} nodes still didn't reply after all attempts")
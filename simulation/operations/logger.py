@@ -1,5 +1,6 @@
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import NamedTuple, List, Dict
 
@@ -32,22 +33,39 @@ def get_logs(network: Network, backend: Backend) -> NetworkLogs:
     # of each node's neighbours in the logs
     ensure_all_alive(network, backend)
 
-    return NetworkLogs(
-        {
-            node.id: NodeLogs(backend.get_logs(node.id), backend.get_human_readable_logs(node.id),)
-            for node in network.nodes
-        }
-    )
+    node_ids = network.ids()
+    with ThreadPoolExecutor(max_workers=network.num_threads) as pool:
+        # Fetch both kinds of logs as separate jobs, so that one node's slow fetch doesn't hold up
+        # the other
+        json_logs = [pool.submit(backend.get_logs, node_id) for node_id in node_ids]
+        human_readable_logs = [
+            pool.submit(backend.get_human_readable_logs, node_id) for node_id in node_ids
+        ]
+        return NetworkLogs(
+            {
+                node_id: NodeLogs(logs.result(), human_readable.result())
+                for node_id, logs, human_readable in zip(node_ids, json_logs, human_readable_logs)
+            }
+        )
 
 
 def write_logs(logs: NetworkLogs, output_directory: Path) -> None:
     log_directory = output_directory / "logs"
-    if not log_directory.is_dir():
-        log_directory.mkdir(parents=True)
+    log_directory.mkdir(parents=True, exist_ok=True)
 
     log.info(f"Saving logs to {log_directory}")
-    for node_id in logs.node_ids():
-        with open(str(log_directory / f"{node_id.key_id}.json"), "w") as file:
-            json.dump(logs.get(node_id).logs, file)
-        with open(str(log_directory / f"{node_id.key_id}.txt"), "wb") as file:
-            file.write(logs.get(node_id).human_readable_logs)
+    with ThreadPoolExecutor() as pool:
+        list(
+            pool.map(
+                lambda item: __write_node_logs(item[0], item[1], log_directory),
+                logs.logs.items(),
+            )
+        )
+
+
+def __write_node_logs(node_id: NodeId, node_logs: NodeLogs, log_directory: Path) -> None:
+    with open(str(log_directory / f"{node_id.key_id}.json"), "w") as file:
+        # Encoding to a string in one go uses the C encoder, which `json.dump` doesn't
+        file.write(json.dumps(node_logs.logs, separators=(",", ":")))
+    with open(str(log_directory / f"{node_id.key_id}.txt"), "wb") as file:
+        file.write(node_logs.human_readable_logs)
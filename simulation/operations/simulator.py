@@ -1,21 +1,26 @@
 import logging
+import multiprocessing
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, Tuple, Any
+from typing import Dict, Any, Optional
 
 import yaml
 
 from simulation.backends import DockerBackend
-from simulation.networks import Network
+from simulation.networks import Network, NodeId
 from simulation.operations import (
     create_builds,
     draw_main_graph,
     draw_query_graph,
+    get_drawing_logs,
     NetworkLogs,
     TestResult,
     sample_test_searches,
     connect_network,
 )
 from simulation.operations import get_logs, write_logs
+from simulation.utils import YAML_DUMPER
 
 log = logging.getLogger(__name__)
 
@@ -43,15 +48,28 @@ def simulate(network: Network, output_directory: Path) -> TestResult:
     log.info("Getting logs and cleaning up backend")
     logs = get_logs(network, backend)
     backend.clean()
+    # Write the logs out while the main graph is being drawn
+    with ThreadPoolExecutor(max_workers=1) as log_writer:
+        logs_written = log_writer.submit(write_logs, logs, output_directory)
+        # Only hold on to what the graphs need, so that the full logs can be freed once written
+        logs = get_drawing_logs(logs)
+
+        log.info("Creating main graph")
+        graph_directory = (output_directory / "graphs").absolute()
+        graph_directory.mkdir(parents=True, exist_ok=True)
+        main_graph_path = graph_directory / "graph.png"
+        draw_main_graph(logs, main_graph_path)
+
+        # Finish writing before starting the processes that draw the search graphs
+        logs_written.result()
 
     log.info("Creating search graphs")
-    main_graph_path, query_graph_paths = __write_graphs(test_results, logs, output_directory)
+    query_graph_paths = __draw_query_graphs(test_results, logs, graph_directory)
 
     log.info("Writing out test results")
     report = __build_report(network, test_results, main_graph_path, query_graph_paths)
     with open(str(output_directory / "report.yaml"), "w") as file:
-        yaml.dump(report, file, default_flow_style=False)
-    write_logs(logs, output_directory)
+        yaml.dump(report, file, Dumper=YAML_DUMPER, default_flow_style=False)
 
     log.info(
         "Results: %.2f%% successful, %.2fs avg, %.2f avg requests",
@@ -62,26 +80,52 @@ def simulate(network: Network, output_directory: Path) -> TestResult:
     return test_results
 
 
-def __write_graphs(
-    results: TestResult, logs: NetworkLogs, output_directory: Path
-) -> Tuple[Path, Dict[str, Path]]:
-    log.info("Drawing all graphs")
-
-    graph_directory = (output_directory / "graphs").absolute()
-    if not graph_directory.is_dir():
-        graph_directory.mkdir(parents=True)
-
-    main_graph_path = graph_directory / "graph.png"
-    draw_main_graph(logs, main_graph_path)
-
-    query_graph_paths: Dict[str, Path] = {}
-    for result in results.search_results:
-        query_graph_path = graph_directory / f"{result.message_id}.png"
-        draw_query_graph(
-            logs, result.from_id, result.to_id, result.message_id, query_graph_path,
-        )
-        query_graph_paths[result.message_id] = query_graph_path
-    return main_graph_path, query_graph_paths
+def __draw_query_graphs(
+    results: TestResult, logs: NetworkLogs, graph_directory: Path
+) -> Dict[str, Path]:
+    # Failed searches share an empty message ID, so only draw the last search for each ID
+    results_by_message = {result.message_id: result for result in results.search_results}
+    query_graph_paths: Dict[str, Path] = {
+        message_id: graph_directory / f"{message_id}.png" for message_id in results_by_message
+    }
+    if not results_by_message:
+        return query_graph_paths
+
+    # Drawing is CPU bound, so use processes to get around the GIL. They're spawned rather than
+    # forked so that they can't inherit a lock held by another thread, and each is sent the logs
+    # once rather than once per graph
+    with ProcessPoolExecutor(
+        max_workers=min(os.cpu_count() or 1, len(results_by_message)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=__set_query_graph_logs,
+        initargs=(logs,),
+    ) as pool:
+        drawings = [
+            pool.submit(
+                __draw_query_graph,
+                result.from_id,
+                result.to_id,
+                message_id,
+                query_graph_paths[message_id],
+            )
+            for message_id, result in results_by_message.items()
+        ]
+        for drawing in drawings:
+            drawing.result()
+    return query_graph_paths
+
+
+# The logs to draw search graphs from, set once in each drawing process
+__query_graph_logs: Optional[NetworkLogs] = None
+
+
+def __set_query_graph_logs(logs: NetworkLogs) -> None:
+    global __query_graph_logs
+    __query_graph_logs = logs
+
+
+def __draw_query_graph(from_id: NodeId, to_id: NodeId, message_id: str, save_path: Path) -> None:
+    draw_query_graph(__query_graph_logs, from_id, to_id, message_id, save_path)
 
 
 def __build_report(
@@ -1,26 +1,34 @@
-import itertools
 import logging
 import random
-from typing import List, NamedTuple
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple, Dict, Tuple
 
 from simulation.backends import Backend
 from simulation.backends.backend import CliCommand
-from simulation.networks import Network, NodeId
+from simulation.networks import Network, Node, NodeId
 
 log = logging.getLogger(__name__)
 
 
 def sample_test_searches(network: Network, backend: Backend, num_searches: int) -> "TestResult":
     log.info(f"Performing {num_searches} searches")
-    nodes = filter(lambda n: not n.disconnect_before_tests, network.nodes)
-    node_pairs = list(itertools.permutations(nodes, 2))
-    if not node_pairs:
+    nodes = [n for n in network.nodes if not n.disconnect_before_tests]
+    if len(nodes) < 2:
         return TestResult([], 0, 0, 0)
-    random_node_pairs = [random.choice(node_pairs) for _ in range(num_searches)]
+    random_node_pairs = __random_node_pairs(nodes, num_searches)
 
     commands = [CliCommand(a.id, ["search", b.key_id()]) for a, b in random_node_pairs]
     command_results = backend.run_commands(commands)
 
+    # Count each node's requests per message once after all searches, rather than scanning its
+    # logs once per search from it
+    from_node_ids = list({from_node.id for from_node, _ in random_node_pairs})
+    with ThreadPoolExecutor(max_workers=network.num_threads) as pool:
+        num_requests_by_message: Dict[NodeId, Counter] = dict(
+            zip(from_node_ids, pool.map(lambda n: __count_requests(n, backend), from_node_ids))
+        )
+
     search_results: List[SearchResult] = []
     for (from_node, to_node), result in zip(random_node_pairs, command_results):
         success = result.successful() and "Search unsuccessful" not in result.stdout
@@ -28,17 +36,9 @@ def sample_test_searches(network: Network, backend: Backend, num_searches: int)
             search_results.append(SearchResult(from_node.id, to_node.id, False, "", 0, 0))
             continue
 
-        message_id = set([l["message_id"] for l in result.cli_logs if "message_id" in l])
-        assert (
-            len(message_id) == 1
-        ), "Couldn't find exactly one `message_id` when testing search, found: {message_id}"
-        message_id = next(iter(message_id))
+        message_id = __get_message_id(result.cli_logs)
 
-        num_requests = sum(
-            1
-            for l in backend.get_logs(from_node.id)
-            if "message_id" in l and l["message_id"] == message_id and "making_request" in l
-        )
+        num_requests = num_requests_by_message[from_node.id][message_id]
 
         search_results.append(
             SearchResult(
@@ -49,6 +49,44 @@ def sample_test_searches(network: Network, backend: Backend, num_searches: int)
     return TestResult.from_searches(search_results)
 
 
+def __get_message_id(cli_logs: List[dict]) -> str:
+    """Get the one `message_id` in a search's logs, without collecting every copy of it"""
+    message_id = None
+    for l in cli_logs:
+        if "message_id" not in l:
+            continue
+        if message_id is None:
+            message_id = l["message_id"]
+        elif l["message_id"] != message_id:
+            raise AssertionError(
+                "Found more than one `message_id` when testing search: "
+                f"{message_id}, {l['message_id']}"
+            )
+    assert message_id is not None, "Couldn't find a `message_id` when testing search"
+    return message_id
+
+
+def __count_requests(node_id: NodeId, backend: Backend) -> Counter:
+    return Counter(
+        l["message_id"]
+        for l in backend.get_logs(node_id)
+        if "message_id" in l and "making_request" in l
+    )
+
+
+def __random_node_pairs(nodes: List[Node], num: int) -> List[Tuple[Node, Node]]:
+    """Pick random ordered pairs of different nodes, without listing every pair"""
+    num_others = len(nodes) - 1
+    pairs = []
+    for index in random.choices(range(len(nodes) * num_others), k=num):
+        a, b = divmod(index, num_others)
+        # Skip over `a` so that every other node is equally likely
+        if b >= a:
+            b += 1
+        pairs.append((nodes[a], nodes[b]))
+    return pairs
+
+
 class TestResult(NamedTuple):
     search_results: List["SearchResult"]
     success_percentage: float
@@ -57,15 +95,24 @@ class TestResult(NamedTuple):
 
     @classmethod
     def from_searches(cls, search_results: List["SearchResult"]) -> "TestResult":
-        successful_results = list(filter(lambda r: r.success, search_results))
-        if len(successful_results) == 0:
+        # Sum everything in one pass over the results
+        num_successes = 0
+        total_num_requests = 0
+        total_search_times_sec = 0.0
+        for result in search_results:
+            if not result.success:
+                continue
+            num_successes += 1
+            total_num_requests += result.num_requests
+            total_search_times_sec += result.search_times_sec
+        if num_successes == 0:
             return TestResult(search_results, 0, 0, 0)
 
         return TestResult(
             search_results,
-            len(successful_results) / len(search_results),
-            sum(map(lambda r: r.num_requests, successful_results)) / len(successful_results),
-            sum(map(lambda r: r.search_times_sec, successful_results)) / len(successful_results),
+            num_successes / len(search_results),
+            total_num_requests / num_successes,
+            total_search_times_sec / num_successes,
         )
 
 
@@ -1,5 +1,11 @@
 import datetime
 
+import yaml
+
+# Use libyaml's loader and dumper when PyYAML was built with it
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
 
 def get_formatted_time() -> str:
     return datetime.datetime.now().strftime("%Y%m%d-%H%M%S")